@@ -15,9 +15,12 @@
 
 import tempfile
 import subprocess
+import concurrent.futures
+import ctypes
 import os
 import re
 import json
+from operator import itemgetter
 import libcalamares
 
 import gettext
@@ -27,6 +30,40 @@ _ = gettext.translation("calamares-python",
                         languages=libcalamares.utils.gettext_languages(),
                         fallback=True).gettext
 
+# umount2(2) from libc, so cleanup does not need to start umount processes.
+# Loaded on first use, since only the error path needs it.
+_libc = None
+_MNT_DETACH = 2
+
+# Trailing partition number on mmcblk / nvme devices, e.g. the "p2" of nvme0n1p2
+_NVME_SUFFIX = re.compile("p[0-9]+$")
+
+# Maps a disk name (e.g. sda, nvme0n1) to whether it is non-rotational,
+# so that /sys is read once per disk rather than once per partition.
+_ROTATIONAL_CACHE = {}
+
+# Maps (id of the options_by_fs map, effective filesystem, disk class) to the
+# joined mount option string, where the disk class is one of "nvme", "ssd" or
+# "hdd". Ids can be reused once a map is freed, so run() clears this.
+_OPTION_STRING_CACHE = {}
+
+# Filesystems that are refused as install targets, except fat32 on a boot path
+_UNSUPPORTED_FS = frozenset({"fat16", "fat32", "ntfs", "ext2", "exfat"})
+_BOOT_MOUNTS = frozenset({"/boot", "/boot/efi"})
+_LUKS_FS = frozenset({"luks", "luks2"})
+
+# Mount points that may already hold data, and the virtual trees below which
+# nothing is checked for emptiness
+_NONEMPTY_ALLOWED_MOUNTS = frozenset({"/home", "/srv", "/boot", "/boot/efi"})
+_VIRTUAL_PREFIXES = ("/sys", "/proc", "/dev", "/run")
+
+# Filesystem metadata that does not make a mount point count as non-empty
+_IGNORED_METADATA = frozenset({
+    "lost+found", ".Trash-1000", "$RECYCLE.BIN",
+    "System Volume Information", ".fseventsd",
+    ".Spotlight-V100"
+})
+
 
 class ZfsException(Exception):
     """Exception raised when there is a problem with zfs
@@ -52,9 +89,9 @@ def disk_name_for_partition(partition):
     name = os.path.basename(partition["device"])
 
     if name.startswith("mmcblk") or name.startswith("nvme"):
-        return re.sub("p[0-9]+$", "", name)
+        return _NVME_SUFFIX.sub("", name)
 
-    return re.sub("[0-9]+$", "", name)
+    return name.rstrip("0123456789")
 
 
 def is_ssd_disk(partition):
@@ -64,22 +101,34 @@ def is_ssd_disk(partition):
     :return: True is the partition in on an ssd, False otherwise
     """
 
-    try:
-        disk_name = disk_name_for_partition(partition)
-        filename = os.path.join("/sys/block", disk_name, "queue/rotational")
-
-        with open(filename) as sysfile:
-            return sysfile.read() == "0\n"
-    except:
+    # Bind and virtual extra mounts may not name a device at all
+    if "device" not in partition:
         return False
 
+    disk_name = disk_name_for_partition(partition)
+    if disk_name in _ROTATIONAL_CACHE:
+        return _ROTATIONAL_CACHE[disk_name]
 
-def get_mount_options(filesystem, mount_options, partition, efi_location = None):
+    # Loop, virtio and mapper devices often have no rotational attribute
+    filename = f"/sys/block/{disk_name}/queue/rotational"
+    is_ssd = False
+    if os.path.exists(filename):
+        try:
+            with open(filename, "rb") as sysfile:
+                is_ssd = sysfile.read(2) == b"0\n"
+        except OSError as e:
+            libcalamares.utils.warning(f"Cannot read {filename}: {e}")
+
+    _ROTATIONAL_CACHE[disk_name] = is_ssd
+    return is_ssd
+
+
+def get_mount_options(filesystem, options_by_fs, partition, efi_location = None):
     """
     Returns the mount options for the partition object and filesystem
 
     :param filesystem: A string containing the filesystem
-    :param mount_options: A list of dicts that descripes the mount options for each mountpoint
+    :param options_by_fs: A dict mapping each filesystem name to its mount options dict from the config file
     :param partition: A dict containing information about the partition
     :param efi_location: A string holding the location of the EFI partition or None
     :return: A comma seperated string containing the mount options suitable for passing to mount
@@ -90,7 +139,7 @@ def get_mount_options(filesystem, mount_options, partition, efi_location = None)
         return ",".join(partition["options"])
 
     # If there are no mount options defined then we use the defaults
-    if mount_options is None:
+    if options_by_fs is None:
         return "defaults"
 
     # The EFI partition uses special mounting options
@@ -99,35 +148,34 @@ def get_mount_options(filesystem, mount_options, partition, efi_location = None)
     else:
         effective_filesystem = filesystem
 
-    options = next((x for x in mount_options if x["filesystem"] == effective_filesystem), None)
-
     # If there is no match then check for default options
-    if options is None:
-        options = next((x for x in mount_options if x["filesystem"] == "default"), None)
+    options = options_by_fs.get(effective_filesystem) or options_by_fs.get("default")
 
     # If it is still None, then fallback to returning defaults
     if options is None:
         return "defaults"
 
-    option_items = options.get("options", []).copy()
-
-    # Append the appropriate options for ssd or hdd if set
     if is_ssd_disk(partition):
-        name = os.path.basename(partition["device"])
-        if name.startswith("nvme"):
-            option_items.extend(options.get("nvmeOptions", []))
+        if os.path.basename(partition["device"]).startswith("nvme"):
+            disk_class = "nvme"
         else:
-            option_items.extend(options.get("ssdOptions", []))
+            disk_class = "ssd"
     else:
-        option_items.extend(options.get("hddOptions", []))
+        disk_class = "hdd"
 
-    if option_items:
-        return ",".join(option_items)
-    else:
-        return "defaults"
+    cache_key = (id(options_by_fs), effective_filesystem, disk_class)
+    if cache_key in _OPTION_STRING_CACHE:
+        return _OPTION_STRING_CACHE[cache_key]
+
+    # Append the appropriate options for ssd or hdd if set
+    option_items = options.get("options", []) + options.get(disk_class + "Options", [])
+    option_string = ",".join(option_items) if option_items else "defaults"
 
+    _OPTION_STRING_CACHE[cache_key] = option_string
+    return option_string
 
-def get_btrfs_subvolumes(partitions):
+
+def get_btrfs_subvolumes(partitions, cfg_subvols, swap_subvol_name, partition_choices):
     """
     Gets the job-configuration for btrfs subvolumes, or if there is
     none given, returns a default configuration that matches
@@ -137,8 +185,14 @@ def get_btrfs_subvolumes(partitions):
         The partitions (from the partitioning module) that will exist on disk.
         This is used to filter out subvolumes that don't need to be created
         because they get a dedicated partition instead.
+    @param cfg_subvols
+        The btrfsSubvolumes list from the job configuration, or None.
+    @param swap_subvol_name
+        The subvolume name to use for a swap file.
+    @param partition_choices
+        The partitionChoices map from global storage, or None.
     """
-    btrfs_subvolumes = libcalamares.job.configuration.get("btrfsSubvolumes", None)
+    btrfs_subvolumes = cfg_subvols
     # Warn if there's no configuration at all, and empty configurations are
     # replaced by a simple root-only layout.
     if btrfs_subvolumes is None:
@@ -148,27 +202,44 @@ def get_btrfs_subvolumes(partitions):
 
     # Identify dedicated partitions (excluding root)
     non_root_partition_mounts = [m for m in [p.get("mountPoint", None) for p in partitions] if
-                                 m is not None and m != '/']
+                                 m and m != '/']
+    mount_set = frozenset(non_root_partition_mounts)
+    mount_prefixes = tuple(m + "/" for m in mount_set)
 
     # Filter: Skip subvolume if it IS a partition OR is INSIDE a partition
     btrfs_subvolumes = [
-        s for s in btrfs_subvolumes 
-        if s["mountPoint"] == "/" or not any(
-            m and (s["mountPoint"] == m or s["mountPoint"].startswith(m + "/"))
-            for m in non_root_partition_mounts
+        s for s in btrfs_subvolumes
+        if s["mountPoint"] == "/" or not (
+            s["mountPoint"] in mount_set or s["mountPoint"].startswith(mount_prefixes)
         )
     ]
 
     # If we have a swap **file**, give it a separate subvolume.
-    swap_choice = libcalamares.globalstorage.value("partitionChoices")
-    if swap_choice and swap_choice.get("swap", None) == "file":
-        swap_subvol = libcalamares.job.configuration.get("btrfsSwapSubvol", "/@swap")
-        btrfs_subvolumes.append({'mountPoint': '/swap', 'subvolume': swap_subvol})
-        libcalamares.globalstorage.insert("btrfsSwapSubvol", swap_subvol)
+    if partition_choices and partition_choices.get("swap", None) == "file":
+        btrfs_subvolumes.append({'mountPoint': '/swap', 'subvolume': swap_subvol_name})
+        libcalamares.globalstorage.insert("btrfsSwapSubvol", swap_subvol_name)
 
     return btrfs_subvolumes
 
 
+def ensure_dir(path):
+    """ Creates the directory @p path if it does not exist yet.
+
+    The parent usually exists already, so try a single mkdir first
+    and only fall back to creating the intermediate directories.
+
+    :param path: The directory to create
+    """
+    try:
+        os.mkdir(path)
+    except FileExistsError:
+        # Like os.makedirs(), refuse a file standing where the directory should be
+        if not os.path.isdir(path):
+            raise
+    except FileNotFoundError:
+        os.makedirs(path, exist_ok=True)
+
+
 def mount_zfs(root_mount_point, partition):
     """ Mounts a zfs partition at @p root_mount_point
 
@@ -183,10 +254,13 @@ def mount_zfs(root_mount_point, partition):
         raise ZfsException(_("Internal error mounting zfs datasets"))
 
     # Find the zpool matching this partition
-    for zfs_pool in zfs_pool_list:
-        if zfs_pool["mountpoint"] == partition["mountPoint"]:
-            pool_name = zfs_pool["poolName"]
-            ds_name = zfs_pool["dsName"]
+    pool_by_mp = {zfs_pool["mountpoint"]: zfs_pool for zfs_pool in zfs_pool_list}
+    zfs_pool = pool_by_mp.get(partition["mountPoint"])
+    if zfs_pool is None:
+        libcalamares.utils.warning(f"No zpool found for {partition['mountPoint']} in zfsPoolInfo")
+        raise ZfsException(_("Internal error mounting zfs datasets"))
+    pool_name = zfs_pool["poolName"]
+    ds_name = zfs_pool["dsName"]
 
     # import the zpool
     try:
@@ -195,18 +269,14 @@ def mount_zfs(root_mount_point, partition):
         raise ZfsException(_("Failed to import zpool"))
 
     # Get the encrpytion information from global storage
-    zfs_info_list = libcalamares.globalstorage.value("zfsInfo")
-    encrypt = False
-    if zfs_info_list:
-        for zfs_info in zfs_info_list:
-            if zfs_info["mountpoint"] == partition["mountPoint"] and zfs_info["encrypted"] is True:
-                encrypt = True
-                passphrase = zfs_info["passphrase"]
-
-    if encrypt is True:
+    zfs_info_list = libcalamares.globalstorage.value("zfsInfo") or []
+    info_by_mp = {zfs_info["mountpoint"]: zfs_info for zfs_info in zfs_info_list if zfs_info["encrypted"] is True}
+    zfs_info = info_by_mp.get(partition["mountPoint"])
+
+    if zfs_info is not None:
         # The zpool is encrypted, we need to unlock it
         try:
-            libcalamares.utils.host_env_process_output(["zfs", "load-key", pool_name], None, passphrase)
+            libcalamares.utils.host_env_process_output(["zfs", "load-key", pool_name], None, zfs_info["passphrase"])
         except subprocess.CalledProcessError:
             raise ZfsException(_("Failed to unlock zpool"))
 
@@ -218,38 +288,74 @@ def mount_zfs(root_mount_point, partition):
             libcalamares.utils.warning("Failed to locate zfs dataset list")
             raise ZfsException(_("Internal error mounting zfs datasets"))
 
-        zfs.sort(key=lambda x: x["mountpoint"])
-        for dataset in zfs:
-            try:
-                if dataset["canMount"] == "noauto" or dataset["canMount"] is True:
-                    libcalamares.utils.host_env_process_output(["zfs", "mount",
-                                                                dataset["zpool"] + '/' + dataset["dsName"]])
-            except subprocess.CalledProcessError:
-                raise ZfsException(_("Failed to set zfs mountpoint"))
+        # `zfs mount` takes a single dataset, and `zfs mount -a` would also mount
+        # datasets of the host's own pools, so each dataset is mounted on its own.
+        mountable = [dataset for dataset in zfs if dataset["canMount"] == "noauto" or dataset["canMount"] is True]
+        mountable.sort(key=itemgetter("mountpoint"))
+        try:
+            for dataset in mountable:
+                libcalamares.utils.host_env_process_output(["zfs", "mount",
+                                                            dataset["zpool"] + '/' + dataset["dsName"]])
+        except subprocess.CalledProcessError:
+            raise ZfsException(_("Failed to set zfs mountpoint"))
     else:
         try:
             libcalamares.utils.host_env_process_output(["zfs", "mount", pool_name + '/' + ds_name])
         except subprocess.CalledProcessError:
             raise ZfsException(_("Failed to set zfs mountpoint"))
 
+def _umount2(path, flags=0):
+    """ Unmounts @p path with the umount2 syscall.
+
+    :param path: The mount point to unmount
+    :param flags: Flags for umount2, e.g. _MNT_DETACH for a lazy unmount
+    :return: 0 on success, the errno value otherwise, or None if libc's umount2 is unavailable
+    """
+    global _libc
+    if _libc is None:
+        try:
+            # The symbols already loaded into this process include libc's
+            libc = ctypes.CDLL(None, use_errno=True)
+            libc.umount2
+        except (OSError, AttributeError):
+            return None
+        _libc = libc
+
+    if _libc.umount2(os.fsencode(path), flags) != 0:
+        return ctypes.get_errno()
+    return 0
+
+
 def err(error_message, active_mounts):
     for tmp_dir in sorted(active_mounts, reverse=True):
         if os.path.ismount(tmp_dir):
-            if subprocess.call(["umount", "-v", tmp_dir]) != 0:
-                subprocess.call(["umount", "-v", "-l", tmp_dir])
+            error = _umount2(tmp_dir)
+            if error is None:
+                if subprocess.call(["umount", "-v", tmp_dir]) != 0:
+                    subprocess.call(["umount", "-v", "-l", tmp_dir])
+            elif error != 0:
+                libcalamares.utils.warning(f"Cannot unmount {tmp_dir}: {os.strerror(error)}, detaching")
+                error = _umount2(tmp_dir, _MNT_DETACH)
+                if error != 0:
+                    libcalamares.utils.warning(f"Cannot detach {tmp_dir}: {os.strerror(error)}")
     raise Exception(error_message)
 
-def mount_partition(root_mount_point, partition, partitions, mount_options, mount_options_list, efi_location, active_mounts):
+def mount_partition(root_mount_point, partition, partitions, options_by_fs, mount_options_list, efi_location, active_mounts,
+                    btrfs_subvol_cfg, swap_subvol_name, partition_choices, selinux_enabled):
     """
     Do a single mount of @p partition inside @p root_mount_point.
 
     :param root_mount_point: A string containing the root of the install
     :param partition: A dict containing information about the partition
     :param partitions: The full list of partitions used to filter out btrfs subvols which have duplicate mountpoints
-    :param mount_options: The mount options from the config file
+    :param options_by_fs: The mount options from the config file, keyed by filesystem
     :param mount_options_list: A list of options for each mountpoint to be placed in global storage for future modules
     :param efi_location: A string holding the location of the EFI partition or None
     :param active_mounts A list of strings
+    :param btrfs_subvol_cfg: The btrfsSubvolumes list from the config file, or None
+    :param swap_subvol_name: The subvolume name to use for a swap file
+    :param partition_choices: The partitionChoices map from global storage, or None
+    :param selinux_enabled: Whether the host has SELinux, in which case the mount point's context is copied
     :return:
     """
     # Create mount point with `+` rather than `os.path.join()` because
@@ -263,15 +369,16 @@ def mount_partition(root_mount_point, partition, partitions, mount_options, moun
     # Ensure that the created directory has the correct SELinux context on
     # SELinux-enabled systems.
 
-    os.makedirs(mount_point, exist_ok=True)
+    ensure_dir(mount_point)
 
-    try:
-        subprocess.call(['chcon', '--reference=' + raw_mount_point, mount_point])
-    except FileNotFoundError as e:
-        libcalamares.utils.warning(str(e))
-    except OSError:
-        libcalamares.utils.error("Cannot run 'chcon' normally.")
-        raise
+    if selinux_enabled:
+        try:
+            subprocess.call(['chcon', '--reference=' + raw_mount_point, mount_point])
+        except FileNotFoundError as e:
+            libcalamares.utils.warning(str(e))
+        except OSError:
+            libcalamares.utils.error("Cannot run 'chcon' normally.")
+            raise
 
     fstype = partition.get("fs", "").lower()
     if fstype == "unformatted":
@@ -283,21 +390,21 @@ def mount_partition(root_mount_point, partition, partitions, mount_options, moun
     device = partition["device"]
 
     # Only allow fat32 on boot path and block incompatible
-    if fstype in ["fat16", "fat32", "ntfs", "ext2", "exfat"]:
-        is_boot = raw_mount_point in ["/boot", "/boot/efi"]
+    if fstype in _UNSUPPORTED_FS:
+        is_boot = raw_mount_point in _BOOT_MOUNTS
         if not (is_boot and fstype == "fat32"):
             err(f"Unsupported {fstype} partition on {raw_mount_point}", am)
         fstype = "vfat"
 
     if "luksMapperName" in partition:
-        device = os.path.join("/dev/mapper", partition["luksMapperName"])
+        device = "/dev/mapper/" + partition["luksMapperName"]
 
     if fstype == "zfs":
         mount_zfs(root_mount_point, partition)
         return
 
 
-    mount_options_string = get_mount_options(fstype, mount_options, partition, efi_location)
+    mount_options_string = get_mount_options(fstype, options_by_fs, partition, efi_location)
 
     # Standard mount for everything EXCEPT Btrfs root (this catches other btrfs partitions)
     if not (fstype == "btrfs" and raw_mount_point == '/'):
@@ -305,14 +412,9 @@ def mount_partition(root_mount_point, partition, partitions, mount_options, moun
             err(f"Cannot mount {device}", am)
 
         # Verify that the install target is empty
-        is_virtual = any(raw_mount_point.startswith(v) for v in ["/sys", "/proc", "/dev", "/run"])
-        if not is_virtual and raw_mount_point not in ["/home", "/srv", "/boot", "/boot/efi"]:
-            ignored_metadata = [
-                "lost+found", ".Trash-1000", "$RECYCLE.BIN", 
-                "System Volume Information", ".fseventsd", 
-                ".Spotlight-V100"
-                ]
-            contents = [f for f in os.listdir(mount_point) if f not in ignored_metadata]
+        is_virtual = raw_mount_point.startswith(_VIRTUAL_PREFIXES)
+        if not is_virtual and raw_mount_point not in _NONEMPTY_ALLOWED_MOUNTS:
+            contents = [f for f in os.listdir(mount_point) if f not in _IGNORED_METADATA]
             if contents:
                 err((
                     f"Device {device} at {raw_mount_point} not empty. "
@@ -323,58 +425,97 @@ def mount_partition(root_mount_point, partition, partitions, mount_options, moun
 
 
     # Btrfs Setup
-    btrfs_subvolumes = get_btrfs_subvolumes(partitions)
+    btrfs_subvolumes = get_btrfs_subvolumes(partitions, btrfs_subvol_cfg, swap_subvol_name, partition_choices)
 
-    # Ensure every entry has a subvolume name
+    # Ensure every entry has a subvolume name, and split off the root subvolume
+    root_sub = None
+    other_subvolumes = []
     for s in btrfs_subvolumes:
         if not s.get("mountPoint") or not s.get("subvolume"):
             err(f"Btrfs config error: entry missing mountPoint or subvolume name", am)
+        if s["mountPoint"] != "/":
+            other_subvolumes.append(s)
+        elif root_sub is None:
+            root_sub = s
 
-    # Ensure root subvolume with mountpoint / exists 
-    root_sub = next((s for s in btrfs_subvolumes if s["mountPoint"] == "/"), None)
+    # Ensure root subvolume with mountpoint / exists
     if not root_sub:
         err("Btrfs config error: root subvolume not found", am)
 
     # Mount raw partition to create subvolumes
-    with tempfile.TemporaryDirectory(prefix="calam-btrfs-") as setup_dir:
-        am.append(setup_dir)
+    setup_dir = tempfile.mkdtemp(prefix="calam-btrfs-")
+    am.append(setup_dir)
+    try:
         if libcalamares.utils.mount(device, setup_dir, fstype, "defaults") != 0:
             err(f"Cannot mount btrfs for subvolume creation {device}", am)
-        try:
-            for s in btrfs_subvolumes:
-                sub_path = setup_dir + s["subvolume"]
-                if os.path.exists(sub_path):
-                    err((
-                        f"Subvolume {s['subvolume']} already exists on {device}. "
-                        "Only /home or /srv allowed."), am)
-            for s in btrfs_subvolumes:
-                sub_path = setup_dir + s["subvolume"]
-                os.makedirs(os.path.dirname(sub_path), exist_ok=True)
+
+        # Subvolumes usually live at the top level, so one scan answers most lookups
+        with os.scandir(setup_dir) as entries:
+            top_level = {entry.name for entry in entries}
+        sub_paths = []
+        for s in btrfs_subvolumes:
+            sub_path = setup_dir + s["subvolume"]
+            name = s["subvolume"].lstrip("/")
+            exists = name in top_level if "/" not in name else os.path.lexists(sub_path)
+            if exists:
+                err((
+                    f"Subvolume {s['subvolume']} already exists on {device}. "
+                    "Only /home or /srv allowed."), am)
+            sub_paths.append(sub_path)
+
+        # A subvolume nested inside another needs its parent to exist first,
+        # otherwise all of them can be created by a single btrfs invocation.
+        nested = any(p.startswith(q + "/") for p in sub_paths for q in sub_paths)
+        for sub_path in sub_paths:
+            ensure_dir(os.path.dirname(sub_path))
+            if nested:
                 subprocess.check_call(["btrfs", "subvolume", "create", sub_path])
-                # Set secure permissions for /root subvolume (750 instead of default 755)
-                if s["mountPoint"] == "/root":
-                    os.chmod(sub_path, 0o750)
-        finally:
-            if os.path.ismount(setup_dir):
+        if not nested:
+            try:
+                subprocess.check_call(["btrfs", "subvolume", "create", *sub_paths])
+            except subprocess.CalledProcessError:
+                # Older btrfs-progs accept only one destination per call
+                for sub_path in sub_paths:
+                    if not os.path.lexists(sub_path):
+                        subprocess.check_call(["btrfs", "subvolume", "create", sub_path])
+
+        # Set secure permissions for /root subvolume (750 instead of default 755)
+        for s, sub_path in zip(btrfs_subvolumes, sub_paths):
+            if s["mountPoint"] == "/root":
+                os.chmod(sub_path, 0o750)
+    finally:
+        if os.path.ismount(setup_dir):
+            error = _umount2(setup_dir)
+            if error is None:
                 subprocess.call(["umount", "-v", setup_dir])
+            elif error != 0:
+                libcalamares.utils.warning(f"Cannot unmount {setup_dir}: {os.strerror(error)}")
+        # If it is still mounted, leave it in am so that err() detaches it.
+        # Never clean up recursively: if the umount failed, that would
+        # delete the contents of the btrfs filesystem itself.
+        if not os.path.ismount(setup_dir):
             if setup_dir in am:
                 am.remove(setup_dir)
+            try:
+                os.rmdir(setup_dir)
+            except OSError as e:
+                libcalamares.utils.warning(f"Cannot remove {setup_dir}: {e}")
+
+    # Every subvolume mount shares the same options after its subvol= entry
+    opt_suffix = "," + mount_options_string
 
     # Mount the specific @ root subvolume
-    root_opts = f"subvol={root_sub['subvolume']},{mount_options_string}"
+    root_opts = "subvol=" + root_sub['subvolume'] + opt_suffix
 
     if libcalamares.utils.mount(device, root_mount_point, fstype, root_opts) != 0:
         err(f"Failed to mount root subvolume {device}", am)
 
     # Mount remaining subvolumes
-    for s in btrfs_subvolumes:
-        if s["mountPoint"] == "/":
-            continue
-
+    for s in other_subvolumes:
         # Prepare subvolume mount options and target mount point
-        sub_opts = f"subvol={s['subvolume']},{mount_options_string}" 
+        sub_opts = "subvol=" + s['subvolume'] + opt_suffix
         sub_path = root_mount_point + s["mountPoint"]
-        os.makedirs(sub_path, exist_ok=True)
+        ensure_dir(sub_path)
 
         if libcalamares.utils.mount(device, sub_path, fstype, sub_opts) == 0:
             mount_options_list.append({"mountpoint": s["mountPoint"], "option_string": mount_options_string})
@@ -387,10 +528,38 @@ def mount_partition(root_mount_point, partition, partitions, mount_options, moun
     libcalamares.globalstorage.insert("btrfsSubvolumes", btrfs_subvolumes)
 
 
+def group_independent_mounts(partitions):
+    """
+    Splits @p partitions, sorted by mountPoint, into consecutive groups
+    that can be mounted concurrently: no mount point in a group lies
+    inside another one of the same group. Zfs partitions always get a
+    group of their own, since pool imports are order-sensitive.
+
+    :param partitions: A list of partition dicts, sorted by mountPoint
+    :return: A list of lists of partition dicts, in mount order
+    """
+    groups = []
+    group = []
+    for p in partitions:
+        mount_point = p["mountPoint"]
+        is_zfs = p.get("fs", "").lower() == "zfs"
+        nested = any(mount_point == m or mount_point.startswith(m.rstrip("/") + "/")
+                     for m in (q["mountPoint"] for q in group))
+        if group and (is_zfs or nested or group[0].get("fs", "").lower() == "zfs"):
+            groups.append(group)
+            group = []
+        group.append(p)
+    if group:
+        groups.append(group)
+    return groups
+
+
 def enable_swap_partition(devices):
+    # Without arguments swapon only prints a summary
+    if not devices:
+        return
     try:
-        for d in devices:
-            libcalamares.utils.host_env_process_output(["swapon", d])
+        libcalamares.utils.host_env_process_output(["swapon", *devices])
     except subprocess.CalledProcessError:
         libcalamares.utils.warning(f"Failed to enable swap for devices: {devices}")
 
@@ -402,6 +571,8 @@ def run():
     """
 
     partitions = libcalamares.globalstorage.value("partitions")
+    _ROTATIONAL_CACHE.clear()
+    _OPTION_STRING_CACHE.clear()
 
     if not partitions:
         libcalamares.utils.warning("partitions is empty, {!s}".format(partitions))
@@ -414,10 +585,14 @@ def run():
     subprocess.run(["lua", "/etc/calamares/scripts/minimal.lua", tempJson])
 
     # Find existing swap partitions that are part of the installation and enable them now
-    claimed_swap_partitions = [p for p in partitions if p["fs"] == "linuxswap" and p.get("claimed", False)]
-    plain_swap = [p for p in claimed_swap_partitions if p["fsName"] == "linuxswap"]
-    luks_swap = [p for p in claimed_swap_partitions if p["fsName"] == "luks" or p["fsName"] == "luks2"]
-    swap_devices = [p["device"] for p in plain_swap] + ["/dev/mapper/" + p["luksMapperName"] for p in luks_swap]
+    swap_devices = []
+    for p in partitions:
+        if p["fs"] != "linuxswap" or not p.get("claimed", False):
+            continue
+        if p["fsName"] == "linuxswap":
+            swap_devices.append(p["device"])
+        elif p["fsName"] in _LUKS_FS:
+            swap_devices.append("/dev/mapper/" + p["luksMapperName"])
 
     enable_swap_partition(swap_devices)
 
@@ -425,6 +600,20 @@ def run():
 
     # Get the mountOptions, if this is None, that is OK and will be handled later
     mount_options = libcalamares.job.configuration.get("mountOptions")
+    options_by_fs = None
+    if mount_options is not None:
+        # The first entry for a filesystem wins, as with a linear search
+        options_by_fs = {}
+        for x in mount_options:
+            options_by_fs.setdefault(x["filesystem"], x)
+
+    # Look these up once here rather than once per partition / subvolume
+    btrfs_subvol_cfg = libcalamares.job.configuration.get("btrfsSubvolumes", None)
+    swap_subvol_name = libcalamares.job.configuration.get("btrfsSwapSubvol", "/@swap")
+    partition_choices = libcalamares.globalstorage.value("partitionChoices")
+
+    # Only SELinux hosts need the mount points' security context fixed up
+    selinux_enabled = os.path.exists("/sys/fs/selinux/enforce")
 
     # Guard against missing keys (generally a sign that the config file is bad)
     extra_mounts = libcalamares.job.configuration.get("extraMounts") or []
@@ -448,18 +637,41 @@ def run():
 
     # Lexical Sort: mount / before sub-paths  
     physical = [p for p in partitions if "mountPoint" in p and p["mountPoint"]]
-    physical.sort(key=lambda x: x["mountPoint"])
+    physical.sort(key=itemgetter("mountPoint"))
+
+    def mount(p, options_list, mounts):
+        mount_partition(root_mount_point, p, partitions, options_by_fs, options_list, efi_location, mounts,
+                        btrfs_subvol_cfg, swap_subvol_name, partition_choices, selinux_enabled)
 
     try:
-        for p in physical:
-            mount_partition(root_mount_point, p, partitions, mount_options, mount_options_list, efi_location, active_mounts)
-         
+        # Mounts within a group do not depend on each other, and mostly wait
+        # on the kernel, so run them side by side. Each mount collects its
+        # options and active mounts separately: mount_options_list stays in
+        # lexical order, and a failing mount only undoes itself. The full
+        # teardown happens in the except below, on this thread.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            for group in group_independent_mounts(physical):
+                if len(group) == 1:
+                    mount(group[0], mount_options_list, active_mounts)
+                    continue
+                options_lists = [[] for _p in group]
+                mounts_lists = [[] for _p in group]
+                futures = [executor.submit(mount, p, options_list, mounts)
+                           for p, options_list, mounts in zip(group, options_lists, mounts_lists)]
+                concurrent.futures.wait(futures)
+                for mounts in mounts_lists:
+                    active_mounts.extend(mounts)
+                for f in futures:
+                    f.result()
+                for options_list in options_lists:
+                    mount_options_list.extend(options_list)
+
         # Bind/Virtual: After creating Btrfs subvolumes
         extra = [p for p in extra_mounts if "mountPoint" in p and p["mountPoint"]]
-        extra.sort(key=lambda x: x["mountPoint"])
+        extra.sort(key=itemgetter("mountPoint"))
 
         for p in extra:
-            mount_partition(root_mount_point, p, partitions, mount_options, mount_options_list, efi_location, active_mounts)
+            mount(p, mount_options_list, active_mounts)
 
     except Exception as e:
         err(str(e), active_mounts)